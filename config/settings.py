@@ -144,5 +144,50 @@ DEFAULT_CELERY_QUEUE = CELERY_TASK_DEFAULT_QUEUE
 # Telegram / Xray
 TELEGRAM_API_ID = os.getenv('TELEGRAM_API_ID')
 TELEGRAM_API_HASH = os.getenv('TELEGRAM_API_HASH')
+# Scans poll active channels with the 'session_name' Telethon session, which listen_telegram also uses.
+# Only one process can hold it, so set this to False everywhere when the listener is deployed.
+SCANNER_TELEGRAM_POLLING = os.getenv('SCANNER_TELEGRAM_POLLING', 'True') == 'True'
 XRAY_PATH = os.getenv('XRAY_PATH', './xray')
 CSRF_TRUSTED_ORIGINS = [f'http://localhost:{os.getenv("RANDOM_PORT")}' ]
+
+# Scanner
+# Links stream through the scan journal table, so a scan holds one source's links at a time.
+# Bloom-filter dedup also keeps the endpoint seen-set at a fixed size on huge mirror lists;
+# Bloom hits are confirmed against the journal before a link is skipped.
+SCANNER_BLOOM_DEDUP = os.getenv('SCANNER_BLOOM_DEDUP', 'False') == 'True'
+SCANNER_BLOOM_CAPACITY = int(os.getenv('SCANNER_BLOOM_CAPACITY', '1000000'))
+SCANNER_BLOOM_ERROR_RATE = float(os.getenv('SCANNER_BLOOM_ERROR_RATE', '0.0001'))
+# Yield-based scheduling: sources producing more working nodes are rescanned sooner.
+SCANNER_YIELD_ALPHA = float(os.getenv('SCANNER_YIELD_ALPHA', '0.3'))
+SCANNER_SCHEDULE_MIN_INTERVAL = int(os.getenv('SCANNER_SCHEDULE_MIN_INTERVAL', str(30 * 60)))
+# Nodes without an active source are retested by a scheduled scan once they are this old.
+SCANNER_SCHEDULE_MAX_INTERVAL = int(os.getenv('SCANNER_SCHEDULE_MAX_INTERVAL', str(24 * 60 * 60)))
+# Mirror bodies longer than SCANNER_PARSE_CHUNK_LINES are parsed in a process pool (0 disables).
+SCANNER_PARSE_WORKERS = int(os.getenv('SCANNER_PARSE_WORKERS', '0'))
+SCANNER_PARSE_CHUNK_LINES = int(os.getenv('SCANNER_PARSE_CHUNK_LINES', '20000'))
+# Scan progress is journalled every N results or T seconds; unfinished scans younger than the max age resume.
+SCANNER_CHECKPOINT_EVERY = int(os.getenv('SCANNER_CHECKPOINT_EVERY', '20'))
+SCANNER_CHECKPOINT_INTERVAL = int(os.getenv('SCANNER_CHECKPOINT_INTERVAL', '60'))
+SCANNER_RESUME_MAX_AGE = int(os.getenv('SCANNER_RESUME_MAX_AGE', str(6 * 60 * 60)))
+# A running scan is only taken as interrupted once its heartbeat is this old.
+SCANNER_RUN_STALE_AFTER = int(os.getenv('SCANNER_RUN_STALE_AFTER', str(30 * 60)))
+# Initial and maximum parallel TCP probes / xray tests; AIMD adjusts between 1 and the maximum.
+SCANNER_TCP_CONCURRENCY = int(os.getenv('SCANNER_TCP_CONCURRENCY', '32'))
+SCANNER_TCP_CONCURRENCY_MAX = int(os.getenv('SCANNER_TCP_CONCURRENCY_MAX', '256'))
+SCANNER_XRAY_CONCURRENCY = int(os.getenv('SCANNER_XRAY_CONCURRENCY', '4'))
+SCANNER_XRAY_CONCURRENCY_MAX = int(os.getenv('SCANNER_XRAY_CONCURRENCY_MAX', '32'))
+
+# Region-tagged probe workers. Each region listens on its own queue,
+# e.g. `celery -A config worker -Q folks_queue.eu` with SCANNER_REGION=eu.
+# Region workers only need the broker: nodes arrive in the task arguments and
+# results are stored by the workers on the default queue. With regions set, the
+# quorum alone decides which nodes work; the central scanner's retests vote as
+# SCANNER_REGION (default "central") only if that is one of SCANNER_REGIONS.
+SCANNER_REGIONS = [r for r in os.getenv('SCANNER_REGIONS', '').split(',') if r]
+SCANNER_REGION = os.getenv('SCANNER_REGION')
+SCANNER_REGION_QUORUM = int(os.getenv('SCANNER_REGION_QUORUM', str(len(SCANNER_REGIONS) // 2 + 1)))
+SCANNER_REGION_PROBE_MAX_AGE = int(os.getenv('SCANNER_REGION_PROBE_MAX_AGE', str(6 * 60 * 60)))
+SCANNER_REGION_BATCH_SIZE = int(os.getenv('SCANNER_REGION_BATCH_SIZE', '200'))
+# Subscriptions are rendered once at the end of each scan; pushed links and region
+# results queue a render this many seconds later, so a burst renders only once.
+SCANNER_RENDER_DELAY = int(os.getenv('SCANNER_RENDER_DELAY', '30'))
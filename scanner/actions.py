@@ -1,4 +1,3 @@
-import base64
 import datetime
 import json
 import os
@@ -8,29 +7,68 @@ import signal
 import socket
 import subprocess
 import time
+from concurrent.futures import ProcessPoolExecutor
 
-import requests
 from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
 from django.utils import timezone
 
-from .models import Channel, Mirror, Node
+from .concurrency import AIMDController, run_adaptive
+from .dedup import BloomFilter, SeenSet, fingerprint
+from .journal import ScanJournal
+from .models import Channel, Mirror, Node, ScanJournalEntry
+from .parsing import build_outbound, extract_user_id, node_user_id, parse_body, parse_chunk
+from .regions import dispatch_region_probes, local_region, record_region_probes, regions
+from .sources import SourceStats, record_source_scans, retest_scope
+from .subscriptions import render_subscriptions, schedule_render
 
 # === CONFIGURATION ===
 api_id = getattr(settings, 'TELEGRAM_API_ID', None)
 api_hash = getattr(settings, 'TELEGRAM_API_HASH', None)
+telegram_polling = getattr(settings, 'SCANNER_TELEGRAM_POLLING', True)
 timeout = 10
-
-try:
-    from telethon.sync import TelegramClient  # sync import!
-except ImportError:
-    TelegramClient = None
-
-patterns = {
-    'vless': re.compile(r'vless://[^\s]+'),
-    'vmess': re.compile(r'vmess://[^\s]+'),
-    'trojan': re.compile(r'trojan://[^\s]+'),
-    'ss': re.compile(r'ss://[^\s]+'),
-}
+bloom_dedup = getattr(settings, 'SCANNER_BLOOM_DEDUP', False)
+bloom_capacity = getattr(settings, 'SCANNER_BLOOM_CAPACITY', 1_000_000)
+bloom_error_rate = getattr(settings, 'SCANNER_BLOOM_ERROR_RATE', 0.0001)
+parse_workers = getattr(settings, 'SCANNER_PARSE_WORKERS', 0)
+parse_chunk_lines = getattr(settings, 'SCANNER_PARSE_CHUNK_LINES', 20000)
+tcp_concurrency = getattr(settings, 'SCANNER_TCP_CONCURRENCY', 32)
+tcp_concurrency_max = getattr(settings, 'SCANNER_TCP_CONCURRENCY_MAX', 256)
+xray_concurrency = getattr(settings, 'SCANNER_XRAY_CONCURRENCY', 4)
+xray_concurrency_max = getattr(settings, 'SCANNER_XRAY_CONCURRENCY_MAX', 32)
+
+# requests and Telethon are heavy to import, so they are only loaded once a
+# scan actually needs them (web workers never do).
+def get_telegram_client():
+    try:
+        from telethon.sync import TelegramClient  # sync import!
+    except ImportError:
+        return None
+    return TelegramClient
+
+def new_seen_set():
+    if bloom_dedup:
+        return SeenSet(BloomFilter(bloom_capacity, bloom_error_rate))
+    return SeenSet()
+
+def collect_links(journal, parsed, stats=None):
+    for item in parsed:
+        if stats is not None:
+            stats.links_extracted += 1
+        journal.add_extracted(item, stats)
+
+def allocate_socks_port(in_use):
+    socks_port = random.randint(10000, 20000)
+    while socks_port in in_use:
+        socks_port = random.randint(10000, 20000)
+    in_use.add(socks_port)
+    return socks_port
+
+def extract_remark(link):
+    if '#' in link:
+        return link.split('#', 1)[1]
+    return ''
 
 def modify_remark(link, proto):
     random_number = random.randint(1000, 9999)
@@ -43,67 +81,6 @@ def modify_remark(link, proto):
     else:
         return f'{link}#{new_remark}'
 
-def parse_query_params(link):
-    try:
-        query = link.split('?', 1)[1].split('#')[0]
-        params = dict(x.split('=') for x in query.split('&') if '=' in x)
-        return params
-    except Exception:
-        return {}
-
-def extract_host_port(link, proto):
-    try:
-        if proto in ['vless', 'trojan']:
-            part = link.split('://')[1].split('@')[-1]
-            hostport = part.split('?')[0].split('#')[0]
-            host, port = hostport.split(':')
-            return host, int(port)
-        elif proto == 'vmess':
-            b64_payload = link.split('vmess://')[1].split('#')[0]
-            padded = b64_payload + '=' * (-len(b64_payload) % 4)
-            decoded = base64.b64decode(padded).decode()
-            json_data = json.loads(decoded)
-            return json_data.get('add'), int(json_data.get('port'))
-        elif proto == 'ss':
-            ss_part = link.split('ss://')[1].split('#')[0]
-            if '@' in ss_part:
-                hostport = ss_part.split('@')[-1]
-            else:
-                padded = ss_part + '=' * (-len(ss_part) % 4)
-                decoded = base64.b64decode(padded).decode()
-                _, hostport = decoded.rsplit('@', 1)
-            host, port = hostport.split(':')
-            return host, int(port)
-    except Exception:
-        return None, None
-
-def extract_user_id(link, proto):
-    try:
-        if proto in ['vless', 'trojan']:
-            part = link.split('://')[1]
-            user = part.split('@')[0]
-            return user
-        elif proto == 'vmess':
-            b64_payload = link.split('vmess://')[1].split('#')[0]
-            padded = b64_payload + '=' * (-len(b64_payload) % 4)
-            decoded = base64.b64decode(padded).decode()
-            json_data = json.loads(decoded)
-            return json_data.get('id')
-        elif proto == 'ss':
-            ss_part = link.split('ss://')[1].split('#')[0]
-            if '@' in ss_part:
-                userpass_b64 = ss_part.split('@')[0]
-                padded = userpass_b64 + '=' * (-len(userpass_b64) % 4)
-                decoded = base64.b64decode(padded).decode()
-                method, password = decoded.split(':', 1)
-            else:
-                decoded = base64.b64decode(ss_part + '=' * (-len(ss_part) % 4)).decode()
-                method, rest = decoded.split(':', 1)
-                password, _ = rest.split('@', 1)
-            return password, method
-    except Exception:
-        return None
-
 def tcp_ping(host, port, timeout=2):
     try:
         start = time.time()
@@ -123,46 +100,7 @@ def wait_for_port(port, timeout=10):
     return False
 
 def build_xray_config(link, proto, socks_port):
-    host, port = extract_host_port(link, proto)
-    params = parse_query_params(link)
-    if proto == 'ss':
-        user_id, method = extract_user_id(link, proto)
-    else:
-        user_id = extract_user_id(link, proto)
-        method = None
-
-    stream_settings = {"network": params.get('type', 'tcp')}
-    if params.get('security') == 'tls':
-        stream_settings["security"] = "tls"
-        if 'sni' in params:
-            stream_settings["tlsSettings"] = {"serverName": params['sni']}
-    if stream_settings['network'] == 'ws':
-        stream_settings['wsSettings'] = {"path": params.get('path', '/'), "headers": {"Host": params.get('host', host)}}
-    if stream_settings['network'] == 'grpc':
-        stream_settings['grpcSettings'] = {"serviceName": params.get('serviceName', ''), "multiMode": False}
-
-    if proto in ['vless', 'vmess']:
-        outbound = {
-            "protocol": proto,
-            "settings": {
-                "vnext": [{
-                    "address": host,
-                    "port": port,
-                    "users": [{"id": user_id, "encryption": "none" if proto == 'vless' else "auto"}]
-                }]
-            },
-            "streamSettings": stream_settings
-        }
-    elif proto == 'trojan':
-        outbound = {
-            "protocol": "trojan",
-            "settings": {"servers": [{"address": host, "port": port, "password": user_id}]}
-        }
-    elif proto == 'ss':
-        outbound = {
-            "protocol": "shadowsocks",
-            "settings": {"servers": [{"address": host, "port": port, "password": user_id, "method": method}]}
-        }
+    outbound = build_outbound(link, proto)
     return {
         "log": {"loglevel": "warning"},
         "inbounds": [{"port": socks_port, "listen": "127.0.0.1", "protocol": "socks", "settings": {"udp": True}}],
@@ -211,28 +149,113 @@ def test_config_with_xray(link, proto, socks_port, timeout=20):
 
     return success, speed_kbps
 
-def fetch_mirror_links(mirror_urls):
-    mirror_links = {proto: set() for proto in patterns.keys()}
-    for url in mirror_urls:
+def fetch_mirror_links(mirrors, journal, source_stats=None, pool=None):
+    """Fetch and parse mirrors, journalling their links one mirror at a time."""
+    import requests
+    for mirror in mirrors:
+        url = mirror.url
+        stats = SourceStats(mirror)
+        if source_stats is not None:
+            source_stats.append(stats)
         try:
+            start = time.time()
             resp = requests.get(url, timeout=10)
+            stats.fetch_latency_ms = int((time.time() - start) * 1000)
             if resp.status_code == 200:
-                text = resp.text
-                for proto, pattern in patterns.items():
-                    matches = pattern.findall(text)
-                    for link in matches:
-                        mirror_links[proto].add(link.strip())
+                parsed = parse_body(resp.text, pool, parse_chunk_lines)
+                collect_links(journal, parsed, stats)
+                journal.flush_extracted()
                 print(f"✅ Fetched from {url}")
             else:
                 print(f"❌ Failed to fetch {url} (status {resp.status_code})")
         except Exception as e:
             print(f"❌ Error fetching {url}: {e}")
-    return mirror_links
 
-def run_full_scan_sync(channel_ids=None, mirror_ids=None):
-    use_telegram = api_id and api_hash and TelegramClient is not None
-    collected_links = {proto: set() for proto in patterns.keys()}
+def verify_links(links, source=None):
+    """Probe and xray-test pushed links, saving the working ones as Nodes."""
+    new_nodes = []
     seen_keys = set()
+    for proto, host, port, user_id, _, link in parse_chunk('\n'.join(links)):
+        key = fingerprint(proto, host, port, user_id)
+        if not host or not port or key in seen_keys:
+            continue
+        seen_keys.add(key)
+        if Node.objects.filter(protocol=proto, host=host, port=port, user_id=user_id).exists():
+            continue
+        delay = tcp_ping(host, port, timeout)
+        if not 0 < delay < 1050:
+            print(f'❌ {proto.upper()} {host}:{port} → TCP fail ({delay}ms)')
+            continue
+        print(f'✅ {proto.upper()} {host}:{port} → {delay}ms')
+        modified = modify_remark(link, proto)
+        socks_port = random.randint(10000, 20000)
+        ok, speed = test_config_with_xray(modified, proto, socks_port, timeout=20)
+        if ok:
+            new_nodes.append(Node(
+                protocol=proto,
+                raw_link=modified,
+                host=host,
+                port=port,
+                user_id=user_id,
+                remark=extract_remark(modified),
+                source=source,
+                last_speed_kbps=speed,
+                last_checked=timezone.now(),
+                is_working=not regions,
+            ))
+    if new_nodes:
+        Node.objects.bulk_create(new_nodes, ignore_conflicts=True)
+        print(f'\n✅ Saved {len(new_nodes)} new working configs to Node table')
+        if regions:
+            # bulk_create does not return primary keys on every backend
+            saved = Q()
+            for n in new_nodes:
+                saved |= Q(protocol=n.protocol, host=n.host, port=n.port, user_id=n.user_id)
+            dispatch_region_probes(list(Node.objects.filter(saved).values_list('pk', flat=True)))
+        schedule_render()
+    return len(new_nodes)
+
+def probe_region(nodes, region):
+    """
+    Probe node payloads (see regions.node_payload) from this worker's region.
+    Nothing is written here; the results and the concurrency decisions go
+    back to the central scanner.
+    """
+    control = AIMDController(f'xray@{region}', xray_concurrency, xray_concurrency_max)
+    socks_ports = set()
+    results = []
+
+    def items():
+        for node in nodes:
+            yield node, allocate_socks_port(socks_ports)
+
+    def probe(item):
+        node, socks_port = item
+        delay = tcp_ping(node['host'], node['port'], timeout)
+        if not 0 < delay < 1050:
+            return delay, False, None
+        ok, speed = test_config_with_xray(node['raw_link'], node['protocol'], socks_port, timeout=20)
+        return delay, ok, speed
+
+    def on_result(item, result):
+        node, socks_port = item
+        socks_ports.discard(socks_port)
+        delay, ok, speed = result
+        print(f'{"✅" if ok else "❌"} [{region}] {node["protocol"].upper()} {node["host"]}:{node["port"]} → {delay}ms')
+        results.append({'node': node['pk'], 'is_working': ok, 'ping_ms': delay if delay > 0 else None,
+                        'speed_kbps': speed})
+
+    run_adaptive(control, probe, items(), on_result, deadline=timeout + 20, is_success=lambda r: r[1])
+    return results, control.decisions
+
+def run_full_scan_sync(channel_ids=None, mirror_ids=None):
+    TelegramClient = get_telegram_client() if api_id and api_hash and telegram_polling else None
+    use_telegram = TelegramClient is not None
+    # Links are decoded once (in the parse pool when enabled) and streamed
+    # through the scan journal, so only one source's links are held at a
+    # time. With SCANNER_BLOOM_DEDUP the endpoint seen-set is fixed-size too.
+    seen_keys = new_seen_set()
+    source_stats = []
 
     # Determine trigger source and filter accordingly
     # If called with mirror_ids: only check mirrors, skip channels
@@ -242,24 +265,27 @@ def run_full_scan_sync(channel_ids=None, mirror_ids=None):
     do_channels = channel_ids is not None or (channel_ids is None and mirror_ids is None)
     do_mirrors = mirror_ids is not None or (channel_ids is None and mirror_ids is None)
 
+    # An interrupted scan with the same scope resumes from its journal
+    # instead of fetching again.
+    journal = ScanJournal.open(channel_ids, mirror_ids)
+
     # Channels
-    if do_channels:
+    if do_channels and not journal.resumed:
         channel_qs = Channel.objects.filter(active=True)
         if channel_ids is not None:
             channel_qs = channel_qs.filter(id__in=channel_ids)
         # Telegram part
         if use_telegram:
-            channel_usernames = list(channel_qs.values_list('username', flat=True))
-            if channel_usernames:
+            channels = list(channel_qs)
+            if channels:
                 try:
                     import asyncio
                     loop = asyncio.new_event_loop()
                     asyncio.set_event_loop(loop)
+                    client = TelegramClient('session_name', api_id, api_hash, loop=loop)
 
-                    async def fetch_telegram(channel_usernames):
-                        import getpass
+                    async def connect_telegram():
                         session_file = 'session_name.session'
-                        client = TelegramClient('session_name', api_id, api_hash, loop=loop)
                         if not os.path.exists(session_file):
                             print('No Telegram session found. You need to login.')
                             phone = input('Enter your phone number (with country code, e.g. +989123456789): ')
@@ -268,110 +294,209 @@ def run_full_scan_sync(channel_ids=None, mirror_ids=None):
                             await client.start()
                         print(f'✅ Connected to Telegram')
 
+                    async def read_channel(source, stats):
+                        channel_username = source.username
+                        try:
+                            channel = await client.get_entity(channel_username)
+                            print(f'🔍 Reading channel: {channel_username}')
+                        except Exception as e:
+                            print(f'❌ Cannot get channel {channel_username}: {e}')
+                            return
                         today = datetime.date.today()
                         yesterday = today - datetime.timedelta(days=1)
-                        for channel_username in channel_usernames:
-                            try:
-                                channel = await client.get_entity(channel_username)
-                                print(f'🔍 Reading channel: {channel_username}')
-                            except Exception as e:
-                                print(f'❌ Cannot get channel {channel_username}: {e}')
+                        async for message in client.iter_messages(channel, limit=500):
+                            msg_date = message.date.date()
+                            if msg_date != today and msg_date != yesterday:
                                 continue
-
-                            async for message in client.iter_messages(channel, limit=500):
-                                msg_date = message.date.date()
-                                if msg_date != today and msg_date != yesterday:
-                                    continue
-                                if message.text:
-                                    for proto, pattern in patterns.items():
-                                        matches = pattern.findall(message.text)
-                                        for link in matches:
-                                            collected_links[proto].add(link.strip())
-
-                        await client.disconnect()
-
-                    loop.run_until_complete(fetch_telegram(channel_usernames))
+                            if message.text:
+                                collect_links(journal, parse_chunk(message.text), stats)
+
+                    try:
+                        loop.run_until_complete(connect_telegram())
+                        for source in channels:
+                            stats = SourceStats(source)
+                            source_stats.append(stats)
+                            start = time.time()
+                            loop.run_until_complete(read_channel(source, stats))
+                            stats.fetch_latency_ms = int((time.time() - start) * 1000)
+                            # Between channels, so the ORM never runs inside the event loop
+                            journal.flush_extracted()
+                            journal.heartbeat()
+                    finally:
+                        loop.run_until_complete(client.disconnect())
 
                 except Exception as e:
                     print(f'⚠️ Telegram fetch failed, skipping: {e}')
             else:
                 print('ℹ️ No active channels found, skipping Telegram connection.')
+        elif not telegram_polling:
+            print('ℹ️ Telegram polling is off; listen_telegram pushes channel links.')
 
     # Mirrors
-    if do_mirrors:
+    if do_mirrors and not journal.resumed:
         mirror_qs = Mirror.objects.filter(active=True)
         if mirror_ids is not None:
             mirror_qs = mirror_qs.filter(id__in=mirror_ids)
-        mirror_urls = list(mirror_qs.values_list('url', flat=True))
-        mirror_links = fetch_mirror_links(mirror_urls)
-        for proto in patterns.keys():
-            collected_links[proto].update(mirror_links[proto])
+        if parse_workers:
+            with ProcessPoolExecutor(max_workers=parse_workers) as pool:
+                fetch_mirror_links(list(mirror_qs), journal, source_stats, pool)
+        else:
+            fetch_mirror_links(list(mirror_qs), journal, source_stats)
+
+    if journal.resumed:
+        source_stats = journal.restore()
+    else:
+        journal.finish_extraction()
+    stats_by_label = {stats.label: stats for stats in source_stats}
 
     # === Process + Save (same as before) ===
     final_nodes = []
     update_nodes = []
     node_keys = {}
-    def extract_remark(link):
-        if '#' in link:
-            return link.split('#', 1)[1]
-        return ''
-
-    for proto in collected_links:
-        for link in collected_links[proto]:
-            modified = modify_remark(link, proto)
-            host, port = extract_host_port(modified, proto)
-            user = extract_user_id(modified, proto)
-            remark = extract_remark(modified)
-            key = f"{proto}-{host}-{port}-{user}"
-            if host and port and key not in seen_keys:
-                delay = tcp_ping(host, port, timeout)
-                if 0 < delay < 1050:
-                    print(f'✅ {proto.upper()} {host}:{port} → {delay}ms')
+
+    existing_keys = {fingerprint(n.protocol, n.host, n.port, node_user_id(extract_user_id(n.raw_link, n.protocol)))
+                     for n in Node.objects.only('protocol', 'host', 'port', 'raw_link').iterator()}
+    committed_keys = set()
+
+    def commit_checkpoint():
+        # Commit new working nodes together with the journal, so an
+        # interruption never loses verified results.
+        new_keys = [k for k in node_keys if k not in existing_keys]
+        with transaction.atomic():
+            Node.objects.bulk_create([Node(**node_keys[k]) for k in new_keys], ignore_conflicts=True)
+            journal.checkpoint()
+        for k in new_keys:
+            del node_keys[k]
+        committed_keys.update(new_keys)
+        if new_keys:
+            print(f'💾 Checkpoint: saved {len(new_keys)} new working configs')
+
+    # TCP probes and xray tests run in parallel under AIMD concurrency
+    # limits; all bookkeeping stays on this thread.
+    tcp_control = AIMDController('tcp', tcp_concurrency, tcp_concurrency_max)
+    xray_control = AIMDController('xray', xray_concurrency, xray_concurrency_max)
+
+    def journal_candidate(entry):
+        key = fingerprint(entry.protocol, entry.host, entry.port, entry.user_id)
+        return (entry.protocol, entry.host, entry.port, entry.user_id, bytes.fromhex(entry.fingerprint),
+                entry.raw_link, stats_by_label.get(entry.source), key)
+
+    def probe_candidates():
+        for entry in journal.entries():
+            candidate = journal_candidate(entry)
+            proto, host, port, user_id, fp, link, stats, key = candidate
+            if entry.stage != ScanJournalEntry.EXTRACTED:
+                # Already handled before the interruption
+                if entry.stage != ScanJournalEntry.SKIPPED:
                     seen_keys.add(key)
-                    socks_port = random.randint(10000, 20000)
-                    ok, speed = test_config_with_xray(modified, proto, socks_port, timeout=20)
-                    if ok:
-                        node_keys[key] = {
-                            'protocol': proto,
-                            'raw_link': modified,
-                            'host': host,
-                            'port': port,
-                            'remark': remark,
-                            'last_speed_kbps': speed,
-                            'last_checked': timezone.now(),
-                            'is_working': ok,
-                        }
-                else:
-                    print(f'❌ {proto.upper()} {host}:{port} → TCP fail ({delay}ms)')
-
-    # Re-test all existing nodes for the selected channels/mirrors (or all if none selected)
-    from django.db.models import Q
-
-    # Build a filter for existing nodes based on the scan scope
-    node_filter = Q()
-    if do_channels:
-        # If scanning channels, filter by hosts/ports found in those channels
-        # (or all if no new found, fallback to all active nodes)
-        pass  # No additional filter, as we want to re-test all
-    if do_mirrors:
-        # If scanning mirrors, filter by hosts/ports found in those mirrors
-        pass  # No additional filter, as we want to re-test all
-    # If both, just re-test all
+                    if stats is not None:
+                        stats.unique_new += 1
+                continue
+            # Keys are marked seen when their probe starts, so duplicates of
+            # an in-flight or finished probe are skipped in both dedup modes;
+            # Bloom hits are confirmed against the journal first.
+            # Endpoints already in the Node table are left to the retest below.
+            if (not host or not port or key in existing_keys
+                    or not seen_keys.add_new(key, confirm=lambda: journal.endpoint_seen(entry))):
+                journal.record(fp, ScanJournalEntry.SKIPPED)
+                continue
+            if stats is not None:
+                stats.unique_new += 1
+            yield candidate
+
+    def on_probed(candidate, delay):
+        proto, host, port, user_id, fp, link, stats, key = candidate
+        if 0 < delay < 1050:
+            print(f'✅ {proto.upper()} {host}:{port} → {delay}ms')
+            if stats is not None:
+                stats.tcp_alive += 1
+            journal.record(fp, ScanJournalEntry.PROBED, delay)
+        else:
+            print(f'❌ {proto.upper()} {host}:{port} → TCP fail ({delay}ms)')
+            journal.record(fp, ScanJournalEntry.TCP_FAILED, delay)
+        if journal.due():
+            commit_checkpoint()
+        journal.heartbeat()
+
+    run_adaptive(tcp_control, lambda c: tcp_ping(c[1], c[2], timeout), probe_candidates(), on_probed,
+                 deadline=timeout, is_success=lambda delay: 0 < delay < 1050)
+    # The xray stage reads TCP-alive links back from the journal
+    commit_checkpoint()
+
+    socks_ports = set()
+
+    def verify_candidates():
+        for entry in journal.entries(stage=ScanJournalEntry.PROBED):
+            candidate = journal_candidate(entry)
+            socks_port = allocate_socks_port(socks_ports)
+            yield candidate, modify_remark(candidate[5], candidate[0]), socks_port
+
+    def on_verified(item, result):
+        (proto, host, port, user_id, fp, link, stats, key), modified, socks_port = item
+        socks_ports.discard(socks_port)
+        ok, speed = result
+        journal.record(fp, ScanJournalEntry.VERIFIED if ok else ScanJournalEntry.FAILED, speed_kbps=speed)
+        if ok:
+            if stats is not None:
+                stats.xray_verified += 1
+            node_keys[key] = {
+                'protocol': proto,
+                'raw_link': modified,
+                'host': host,
+                'port': port,
+                'user_id': user_id,
+                'remark': extract_remark(modified),
+                'source': stats.label if stats is not None else None,
+                'last_speed_kbps': speed,
+                'last_checked': timezone.now(),
+                # With regions configured, new nodes wait for the quorum
+                'is_working': not regions,
+            }
+        if journal.due():
+            commit_checkpoint()
+        journal.heartbeat()
+
+    run_adaptive(xray_control, lambda item: test_config_with_xray(item[1], item[0][0], item[2], timeout=20),
+                 verify_candidates(), on_verified, deadline=20, is_success=lambda r: r[0])
+    commit_checkpoint()
+
+    # Re-test existing nodes found in the selected channels/mirrors, plus
+    # overdue orphans (or all if none selected).
+    # With regions configured this host is one more vantage point: its
+    # retests are recorded as probes and the region quorum decides.
     existing_nodes = Node.objects.all()
+    if channel_ids is not None or mirror_ids is not None:
+        existing_nodes = existing_nodes.filter(retest_scope(channel_ids, mirror_ids))
     nodes_to_keep = set()
     nodes_to_delete = []
+    retest_probes = []
     for n in existing_nodes:
+        key = fingerprint(n.protocol, n.host, n.port, node_user_id(extract_user_id(n.raw_link, n.protocol)))
+        if key in committed_keys:
+            # Verified and saved during this scan
+            continue
         # Re-test node
+        journal.heartbeat()
         delay = tcp_ping(n.host, n.port, timeout)
-        if 0 < delay < 1050:
+        alive = 0 < delay < 1050
+        if alive:
             print(f'✅ RETEST {n.protocol.upper()} {n.host}:{n.port} → {delay}ms')
+        else:
+            print(f'❌ RETEST {n.protocol.upper()} {n.host}:{n.port} → TCP fail ({delay}ms)')
+        if regions:
+            retest_probes.append({'node': n.pk, 'is_working': alive, 'ping_ms': delay if delay > 0 else None,
+                                  'speed_kbps': None})
+        elif alive:
             n.last_checked = timezone.now()
             n.is_working = True
             update_nodes.append(n)
-            nodes_to_keep.add(f"{n.protocol}-{n.host}-{n.port}-{extract_user_id(n.raw_link, n.protocol)}")
+            nodes_to_keep.add(key)
         else:
-            print(f'❌ RETEST {n.protocol.upper()} {n.host}:{n.port} → TCP fail ({delay}ms)')
             nodes_to_delete.append(n.pk)
+    retested = [probe['node'] for probe in retest_probes]
+    if retest_probes:
+        Node.objects.filter(pk__in=retested).update(last_checked=timezone.now())
+        record_region_probes(local_region, retest_probes)
     if nodes_to_delete:
         Node.objects.filter(pk__in=nodes_to_delete).delete()
         print(f'\n🗑️ Deleted {len(nodes_to_delete)} non-working configs from Node table')
@@ -384,10 +509,18 @@ def run_full_scan_sync(channel_ids=None, mirror_ids=None):
         Node.objects.bulk_update(update_nodes, ['raw_link', 'last_speed_kbps', 'last_checked', 'is_working'])
         print(f'\n✅ Updated {len(update_nodes)} existing configs in Node table')
     if final_nodes:
-        Node.objects.bulk_create(final_nodes)
+        Node.objects.bulk_create(final_nodes, ignore_conflicts=True)
         print(f'\n✅ Saved {len(final_nodes)} new working configs to Node table')
-    if not final_nodes and not update_nodes:
+    if not final_nodes and not update_nodes and not committed_keys:
         print('\n⚠ No working configs found.')
+    record_source_scans(source_stats)
+    render_subscriptions()
+    journal.finish(metrics={'tcp': tcp_control.decisions, 'xray': xray_control.decisions})
+    if regions:
+        # In-scope nodes, including the ones saved by this scan; the regions'
+        # concurrency decisions are added to this run's metrics.
+        dispatch_ids = set(existing_nodes.values_list('pk', flat=True)) | set(retested)
+        dispatch_region_probes(sorted(dispatch_ids), run_id=journal.run.pk)
 
     # Cleanup: remove all test_*.json files created during config testing
     import glob
@@ -1,20 +1,18 @@
 from django.contrib import admin
 
-from .actions import run_full_scan_sync
-from .models import Channel, Mirror, Node
+from .models import Channel, Mirror, Node, NodeProbe, ScanRun, SourceScan, SubscriptionArtifact
+from .scan import run_full_scan_sync
 
 
 @admin.action(description="Scan and update nodes for selected Mirrors")
 def scan_mirrors(modeladmin, request, queryset):
     mirror_ids = list(queryset.values_list('id', flat=True))
-    from .actions import run_full_scan_sync
     run_full_scan_sync(mirror_ids=mirror_ids)
     modeladmin.message_user(request, f"✅ Scan completed for {len(mirror_ids)} selected mirrors!")
 
 @admin.action(description="Scan and update nodes for selected Channels")
 def scan_channels(modeladmin, request, queryset):
     channel_ids = list(queryset.values_list('id', flat=True))
-    from .actions import run_full_scan_sync
     run_full_scan_sync(channel_ids=channel_ids)
     modeladmin.message_user(request, f"✅ Scan completed for {len(channel_ids)} selected channels!")
 
@@ -22,7 +20,7 @@ def scan_channels(modeladmin, request, queryset):
 
 @admin.register(Mirror)
 class MirrorAdmin(admin.ModelAdmin):
-    list_display = ('url', 'active', 'last_checked')
+    list_display = ('url', 'active', 'yield_score', 'last_checked', 'next_scan_at')
     list_filter = ('active',)
     search_fields = ('url',)
     actions = [scan_mirrors]
@@ -31,15 +29,43 @@ class MirrorAdmin(admin.ModelAdmin):
 
 @admin.register(Channel)
 class ChannelAdmin(admin.ModelAdmin):
-    list_display = ('username', 'active', 'last_checked')
+    list_display = ('username', 'active', 'yield_score', 'last_checked', 'next_scan_at')
     list_filter = ('active',)
     search_fields = ('username',)
     actions = [scan_channels]
 
 
 
+class NodeProbeInline(admin.TabularInline):
+    model = NodeProbe
+    extra = 0
+    readonly_fields = ('region', 'is_working', 'ping_ms', 'speed_kbps', 'checked_at')
+
+
 @admin.register(Node)
 class NodeAdmin(admin.ModelAdmin):
+    inlines = [NodeProbeInline]
     list_display = ('protocol', 'host', 'port', 'remark', 'is_working', 'last_speed_kbps', 'last_checked')
     list_filter = ('protocol', 'is_working')
     search_fields = ('host', 'remark', 'source')
+
+
+
+@admin.register(SourceScan)
+class SourceScanAdmin(admin.ModelAdmin):
+    list_display = ('mirror', 'channel', 'links_extracted', 'unique_new', 'tcp_alive', 'xray_verified', 'fetch_latency_ms', 'created_at')
+    list_filter = ('mirror', 'channel')
+
+
+
+@admin.register(ScanRun)
+class ScanRunAdmin(admin.ModelAdmin):
+    list_display = ('id', 'scope', 'status', 'created_at', 'updated_at', 'finished_at')
+    list_filter = ('status',)
+
+
+
+@admin.register(SubscriptionArtifact)
+class SubscriptionArtifactAdmin(admin.ModelAdmin):
+    list_display = ('format', 'region', 'version', 'node_count', 'created_at')
+    list_filter = ('format', 'region')
@@ -0,0 +1,163 @@
+import os
+import statistics
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+_exhausted = object()
+
+
+def open_fd_ratio():
+    """Open file descriptors as a fraction of RLIMIT_NOFILE, or None if unknown."""
+    try:
+        import resource
+        soft, _ = resource.getrlimit(resource.RLIMIT_NOFILE)
+        if soft <= 0:
+            return None
+        return len(os.listdir('/proc/self/fd')) / soft
+    except (ImportError, OSError, ValueError):
+        return None
+
+
+def load_per_cpu():
+    """One-minute load average per CPU, or None where unsupported."""
+    try:
+        return os.getloadavg()[0] / (os.cpu_count() or 1)
+    except (AttributeError, OSError):
+        return None
+
+
+class AIMDController:
+    """
+    Additive-increase / multiplicative-decrease concurrency limit for one
+    scan stage. After each window of results the limit grows by one, or is
+    cut when timeouts, latency inflation, file descriptors or load average
+    say the box is saturated. Every decision is kept in `decisions`.
+
+    Dead hosts time out no matter how many calls are in flight, so the
+    timeout rate is compared to its own running level rather than to a fixed
+    threshold. Latency is measured on successful calls only, against the
+    lowest median of the last `baseline_windows` windows.
+    """
+
+    def __init__(self, name, initial, maximum, minimum=1, decrease=0.5, min_window=8,
+                 max_timeout_excess=0.2, timeout_alpha=0.3, max_latency_inflation=2.0,
+                 latency_slack_ms=50, baseline_windows=10, max_fd_ratio=0.8, max_load=1.5):
+        self.name = name
+        self.maximum = max(minimum, maximum)
+        self.minimum = minimum
+        self.limit = max(minimum, min(initial, self.maximum))
+        self.decrease = decrease
+        self.min_window = min_window
+        self.max_timeout_excess = max_timeout_excess
+        self.timeout_alpha = timeout_alpha
+        self.max_latency_inflation = max_latency_inflation
+        self.latency_slack_ms = latency_slack_ms
+        self.max_fd_ratio = max_fd_ratio
+        self.max_load = max_load
+        self.timeout_level = None
+        self.window_medians = deque(maxlen=baseline_windows)
+        self.samples = 0
+        self.timeouts = 0
+        self.latencies = []
+        self.stale = 0
+        self.decisions = []
+
+    def observe(self, latency_ms, timed_out, ok=True):
+        if self.stale:
+            # Result of a call started under the previous, higher limit
+            self.stale -= 1
+            return
+        self.samples += 1
+        if timed_out:
+            self.timeouts += 1
+        elif ok:
+            self.latencies.append(latency_ms)
+        if self.samples >= max(self.min_window, self.limit):
+            self._adjust()
+
+    def _adjust(self):
+        timeout_rate = self.timeouts / self.samples
+        latency_ms = statistics.median(self.latencies) if self.latencies else None
+        baseline_ms = min(self.window_medians) if self.window_medians else latency_ms
+        if latency_ms is not None:
+            self.window_medians.append(latency_ms)
+        inflation = latency_ms / baseline_ms if latency_ms and baseline_ms else 1.0
+        fd_ratio = open_fd_ratio()
+        load = load_per_cpu()
+        self.samples = self.timeouts = 0
+        self.latencies = []
+
+        if self.timeout_level is None:
+            self.timeout_level = timeout_rate
+        if timeout_rate > self.timeout_level + self.max_timeout_excess:
+            reason = 'timeouts'
+        elif inflation > self.max_latency_inflation and latency_ms - baseline_ms > self.latency_slack_ms:
+            reason = 'latency'
+        elif fd_ratio is not None and fd_ratio > self.max_fd_ratio:
+            reason = 'fds'
+        elif load is not None and load > self.max_load:
+            reason = 'load'
+        else:
+            reason = None
+
+        if reason != 'timeouts':
+            self.timeout_level += self.timeout_alpha * (timeout_rate - self.timeout_level)
+
+        previous = self.limit
+        if reason is None:
+            self.limit = min(self.maximum, self.limit + 1)
+        else:
+            self.limit = max(self.minimum, int(self.limit * self.decrease))
+            self.stale = previous
+        self.decisions.append({
+            'stage': self.name,
+            'at': time.time(),
+            'limit': self.limit,
+            'previous': previous,
+            'reason': reason or 'increase',
+            'timeout_rate': round(timeout_rate, 3),
+            'timeout_level': round(self.timeout_level, 3),
+            'latency_ms': round(latency_ms, 1) if latency_ms is not None else None,
+            'latency_inflation': round(inflation, 2),
+            'fd_ratio': round(fd_ratio, 3) if fd_ratio is not None else None,
+            'load_per_cpu': round(load, 2) if load is not None else None,
+        })
+        if reason is not None and self.limit != previous:
+            print(f'⚙️ {self.name} concurrency {previous} → {self.limit} ({reason})')
+
+
+def _timed(func, item):
+    start = time.time()
+    result = func(item)
+    return result, time.time() - start
+
+
+def run_adaptive(controller, func, items, on_result, deadline, is_success=None):
+    """
+    Run func over items in threads, keeping at most controller.limit calls in
+    flight. Items are pulled and on_result is called on the calling thread, so
+    bookkeeping (DB writes, seen-sets) never needs locking. Calls that take at
+    least `deadline` seconds count as timeouts; only results passing
+    is_success feed the latency baseline.
+    """
+    items = iter(items)
+    pending = {}
+    exhausted = False
+    with ThreadPoolExecutor(max_workers=controller.maximum) as pool:
+        while True:
+            while not exhausted and len(pending) < controller.limit:
+                item = next(items, _exhausted)
+                if item is _exhausted:
+                    exhausted = True
+                    break
+                pending[pool.submit(_timed, func, item)] = item
+            if not pending:
+                break
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                item = pending.pop(future)
+                result, elapsed = future.result()
+                ok = is_success(result) if is_success is not None else True
+                controller.observe(elapsed * 1000, elapsed >= deadline, ok)
+                on_result(item, result)
@@ -0,0 +1,65 @@
+import hashlib
+import math
+
+
+def fingerprint(*parts):
+    """Fixed-width 16-byte digest of the given key parts."""
+    return hashlib.blake2b('-'.join(str(p) for p in parts).encode(), digest_size=16).digest()
+
+
+class BloomFilter:
+    """Bit-array Bloom filter over 16-byte fingerprints, backed by a bytearray."""
+
+    def __init__(self, capacity, error_rate=0.0001):
+        capacity = max(1, capacity)
+        self.size = max(64, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, digest):
+        # Double hashing: both halves of the digest are already uniform.
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:16], 'little') | 1
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, digest):
+        for pos in self._positions(digest):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, digest):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(digest))
+
+
+class SeenSet:
+    """
+    Seen-set of fingerprints. Exact (a set of digests) by default; with a
+    BloomFilter it uses constant memory, and hits are passed to a `confirm`
+    callback so false positives are not skipped.
+    """
+
+    def __init__(self, bloom=None):
+        self.bloom = bloom
+        self.exact = set() if bloom is None else None
+
+    def __contains__(self, digest):
+        if self.bloom is None:
+            return digest in self.exact
+        return digest in self.bloom
+
+    def add(self, digest):
+        if self.bloom is None:
+            self.exact.add(digest)
+        else:
+            self.bloom.add(digest)
+
+    def add_new(self, digest, confirm=None):
+        """
+        Add digest and return True if it had not been seen before. A Bloom
+        hit only counts as seen once confirm() returns True.
+        """
+        if digest in self:
+            return self.bloom is not None and confirm is not None and not confirm()
+        self.add(digest)
+        return True
+
@@ -0,0 +1,170 @@
+import datetime
+import json
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Channel, Mirror, ScanJournalEntry, ScanRun
+from .sources import SourceStats
+
+checkpoint_every = getattr(settings, 'SCANNER_CHECKPOINT_EVERY', 20)
+checkpoint_interval = getattr(settings, 'SCANNER_CHECKPOINT_INTERVAL', 60)
+resume_max_age = getattr(settings, 'SCANNER_RESUME_MAX_AGE', 6 * 60 * 60)
+# A RUNNING scan whose heartbeat is older than this is taken as interrupted
+stale_after = getattr(settings, 'SCANNER_RUN_STALE_AFTER', 30 * 60)
+heartbeat_interval = min(checkpoint_interval, stale_after / 3)
+
+
+def scan_scope(channel_ids=None, mirror_ids=None):
+    return json.dumps({
+        'channel_ids': sorted(channel_ids) if channel_ids is not None else None,
+        'mirror_ids': sorted(mirror_ids) if mirror_ids is not None else None,
+    })
+
+
+class ScanJournal:
+    """
+    Write-ahead progress journal for one ScanRun. Extracted links are
+    journalled source by source and the probe stages read them back in
+    batches, so a scan never holds every link in memory. Probe/verify
+    results are flushed at each checkpoint, so an interrupted scan can pick
+    up where it stopped.
+    """
+
+    def __init__(self, run, resumed=False):
+        self.run = run
+        self.resumed = resumed
+        self.extracted = {}
+        self.pending = []
+        self.last_checkpoint = time.time()
+        self.last_heartbeat = time.time()
+
+    @classmethod
+    def open(cls, channel_ids=None, mirror_ids=None):
+        """
+        Resume the latest interrupted run with the same scope, or start a new
+        one. Runs with a recent heartbeat are still live and are left alone.
+        """
+        scope = scan_scope(channel_ids, mirror_ids)
+        now = timezone.now()
+        unfinished = ScanRun.objects.filter(scope=scope, status=ScanRun.RUNNING)
+        cutoff = now - datetime.timedelta(seconds=resume_max_age)
+        stale = now - datetime.timedelta(seconds=stale_after)
+        unfinished.filter(created_at__lt=cutoff).update(status=ScanRun.ABANDONED)
+        # Interrupted while fetching: the journal is incomplete, start over
+        unfinished.filter(updated_at__lt=stale, extracted_at__isnull=True).update(status=ScanRun.ABANDONED)
+        ScanJournalEntry.objects.filter(run__status=ScanRun.ABANDONED).delete()
+        for run in unfinished.filter(updated_at__lt=stale).order_by('-created_at'):
+            # Claim the run, unless another process just did
+            if ScanRun.objects.filter(pk=run.pk, status=ScanRun.RUNNING,
+                                      updated_at=run.updated_at).update(updated_at=now):
+                print(f'↩️ Resuming interrupted scan #{run.pk}')
+                return cls(run, resumed=True)
+        return cls(ScanRun.objects.create(scope=scope))
+
+    def add_extracted(self, item, stats=None):
+        """
+        Buffer a parsed link (see parsing.parse_chunk) until flush_extracted.
+        Never touches the database, so it is safe inside an event loop.
+        """
+        proto, host, port, user_id, fp, link = item
+        if fp not in self.extracted:
+            self.extracted[fp] = ScanJournalEntry(
+                run=self.run, fingerprint=fp.hex(), protocol=proto, raw_link=link, host=host, port=port,
+                user_id=user_id, source=stats.label if stats is not None else None)
+
+    def flush_extracted(self):
+        """Write buffered links; the (run, fingerprint) unique index drops links seen before."""
+        ScanJournalEntry.objects.bulk_create(self.extracted.values(), batch_size=1000, ignore_conflicts=True)
+        self.extracted = {}
+
+    def finish_extraction(self):
+        self.flush_extracted()
+        now = timezone.now()
+        ScanRun.objects.filter(pk=self.run.pk).update(extracted_at=now, updated_at=now)
+        self.run.extracted_at = now
+        self.last_heartbeat = time.time()
+
+    def entries(self, stage=None, batch_size=1000):
+        """Yield this run's entries in extraction order, one batch in memory at a time."""
+        last_pk = 0
+        while True:
+            batch = self.run.entries.filter(pk__gt=last_pk).order_by('pk')
+            if stage is not None:
+                batch = batch.filter(stage=stage)
+            batch = list(batch[:batch_size])
+            if not batch:
+                return
+            yield from batch
+            last_pk = batch[-1].pk
+
+    def endpoint_seen(self, entry):
+        """Exact check: did an earlier link of this run have the same endpoint?"""
+        return self.run.entries.filter(pk__lt=entry.pk, protocol=entry.protocol, host=entry.host,
+                                       port=entry.port, user_id=entry.user_id).exists()
+
+    def restore(self):
+        """
+        Rebuild the per-source stats of a resumed run from its journal.
+        Fetch latency is not journalled and stays empty.
+        """
+        stats_by_label = {}
+        for source in list(Channel.objects.all()) + list(Mirror.objects.all()):
+            stats = SourceStats(source)
+            stats_by_label[stats.label] = stats
+        for entry in self.entries():
+            stats = stats_by_label.get(entry.source)
+            if stats is not None:
+                stats.links_extracted += 1
+                if entry.stage in (ScanJournalEntry.PROBED, ScanJournalEntry.FAILED, ScanJournalEntry.VERIFIED):
+                    stats.tcp_alive += 1
+                if entry.stage == ScanJournalEntry.VERIFIED:
+                    stats.xray_verified += 1
+        return [stats for stats in stats_by_label.values() if stats.links_extracted]
+
+    def record(self, fp, stage, ping_ms=None, speed_kbps=None):
+        self.pending.append((fp.hex(), stage, ping_ms, speed_kbps))
+
+    def heartbeat(self, force=False):
+        """Mark the run as live; cheap to call often."""
+        if force or time.time() - self.last_heartbeat >= heartbeat_interval:
+            ScanRun.objects.filter(pk=self.run.pk).update(updated_at=timezone.now())
+            self.last_heartbeat = time.time()
+
+    def due(self):
+        return (len(self.pending) >= checkpoint_every
+                or (self.pending and time.time() - self.last_checkpoint >= checkpoint_interval))
+
+    def checkpoint(self):
+        """Flush pending results; call inside the transaction that commits their nodes."""
+        for fp, stage, ping_ms, speed_kbps in self.pending:
+            fields = {'stage': stage}
+            if ping_ms is not None:
+                fields['ping_ms'] = ping_ms
+            if speed_kbps is not None:
+                fields['speed_kbps'] = speed_kbps
+            ScanJournalEntry.objects.filter(run=self.run, fingerprint=fp).update(**fields)
+        self.pending = []
+        self.last_checkpoint = time.time()
+        self.heartbeat(force=True)
+
+    def finish(self, metrics=None):
+        self.run.entries.all().delete()
+        self.run.status = ScanRun.FINISHED
+        self.run.finished_at = timezone.now()
+        self.run.metrics = metrics or {}
+        self.run.save(update_fields=['status', 'updated_at', 'finished_at', 'metrics'])
+
+
+def record_region_decisions(run_id, region, decisions):
+    """Append a region worker's concurrency decisions to the metrics of the scan that dispatched it."""
+    with transaction.atomic():
+        run = ScanRun.objects.select_for_update().filter(pk=run_id).first()
+        if run is None:
+            return
+        metrics = run.metrics or {}
+        metrics.setdefault('regions', {}).setdefault(region, []).extend(decisions)
+        run.metrics = metrics
+        run.save(update_fields=['metrics'])
@@ -0,0 +1,104 @@
+import asyncio
+import os
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from scanner.models import Channel
+from scanner.parsing import parse_chunk
+from scanner.sources import source_label
+from scanner.tasks import verify_links_task
+
+
+class Command(BaseCommand):
+    help = ('Listen for new messages in active Telegram channels and queue their links for verification. '
+            'Uses the same Telethon session as channel polling in scans, so set SCANNER_TELEGRAM_POLLING=False '
+            'wherever this runs.')
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # chat id -> Node.source label of every subscribed channel
+        self.subscribed = {}
+        # username -> chat id, so each channel is only resolved once
+        self.resolved = {}
+
+    def add_arguments(self, parser):
+        parser.add_argument('--refresh', type=int, default=60,
+                            help='Seconds between reloading the active Channel list.')
+
+    async def refresh(self, client):
+        from telethon import utils
+        from telethon.tl.functions.channels import JoinChannelRequest
+
+        channels = await sync_to_async(list)(Channel.objects.filter(active=True))
+        chats = {}
+        for channel in channels:
+            if channel.username not in self.resolved:
+                try:
+                    entity = await client.get_entity(channel.username)
+                    # Updates only arrive for channels the account has joined
+                    if getattr(entity, 'left', False):
+                        await client(JoinChannelRequest(entity))
+                        self.stdout.write(f'➕ Joined channel {channel.username}')
+                except Exception as e:
+                    self.stderr.write(f'❌ Cannot get or join channel {channel.username}: {e}')
+                    continue
+                self.resolved[channel.username] = utils.get_peer_id(entity)
+            chats[self.resolved[channel.username]] = source_label(channel)
+        added = chats.keys() - self.subscribed.keys()
+        removed = self.subscribed.keys() - chats.keys()
+        if added or removed:
+            self.stdout.write(f'🔄 Subscribed to {len(chats)} channels (+{len(added)} / -{len(removed)})')
+        self.subscribed = chats
+
+    async def refresh_forever(self, client, interval):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.refresh(client)
+            except Exception as e:
+                self.stderr.write(f'⚠️ Channel refresh failed: {e}')
+
+    async def on_message(self, event):
+        source = self.subscribed.get(event.chat_id)
+        if source is None or not event.message.text:
+            return
+        links = [link for _, _, _, _, _, link in parse_chunk(event.message.text)]
+        if links:
+            await sync_to_async(verify_links_task.delay)(links, source)
+            self.stdout.write(f'📥 Queued {len(links)} links from {source}')
+
+    def handle(self, *args, **options):
+        api_id = getattr(settings, 'TELEGRAM_API_ID', None)
+        api_hash = getattr(settings, 'TELEGRAM_API_HASH', None)
+        if not api_id or not api_hash:
+            raise CommandError('TELEGRAM_API_ID and TELEGRAM_API_HASH must be set.')
+        # Two clients on one SQLite session lock each other out
+        if getattr(settings, 'SCANNER_TELEGRAM_POLLING', True):
+            raise CommandError('Scans still poll Telegram with the same session; '
+                               'set SCANNER_TELEGRAM_POLLING=False for the scanner workers and this listener.')
+        try:
+            from telethon import TelegramClient, events
+        except ImportError:
+            raise CommandError('Telethon is not installed.')
+
+        async def listen():
+            client = TelegramClient('session_name', api_id, api_hash)
+            if not os.path.exists('session_name.session'):
+                self.stdout.write('No Telegram session found. You need to login.')
+                phone = input('Enter your phone number (with country code, e.g. +989123456789): ')
+                await client.start(phone=phone)
+            else:
+                await client.start()
+            self.stdout.write(self.style.SUCCESS('✅ Connected to Telegram'))
+
+            await self.refresh(client)
+            client.add_event_handler(self.on_message, events.NewMessage())
+            refresher = asyncio.create_task(self.refresh_forever(client, options['refresh']))
+            try:
+                await client.run_until_disconnected()
+            finally:
+                refresher.cancel()
+
+        asyncio.run(listen())
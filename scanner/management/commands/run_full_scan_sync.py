@@ -1,5 +1,5 @@
 from django.core.management.base import BaseCommand
-from scanner.actions import run_full_scan_sync
+from scanner.scan import run_full_scan_sync
 
 
 class Command(BaseCommand):
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.4 on 2026-10-19 17:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scanner', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='channel',
+            name='next_scan_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='channel',
+            name='yield_score',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='mirror',
+            name='next_scan_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='mirror',
+            name='yield_score',
+            field=models.FloatField(default=0),
+        ),
+        migrations.CreateModel(
+            name='SourceScan',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('links_extracted', models.PositiveIntegerField(default=0)),
+                ('unique_new', models.PositiveIntegerField(default=0)),
+                ('tcp_alive', models.PositiveIntegerField(default=0)),
+                ('xray_verified', models.PositiveIntegerField(default=0)),
+                ('fetch_latency_ms', models.IntegerField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('channel', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='scans', to='scanner.channel')),
+                ('mirror', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='scans', to='scanner.mirror')),
+            ],
+        ),
+    ]
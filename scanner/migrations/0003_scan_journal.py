@@ -0,0 +1,41 @@
+# Generated by Django 5.2.4 on 2026-10-19 17:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scanner', '0002_source_scoring'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScanRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(max_length=1024)),
+                ('status', models.CharField(choices=[('running', 'Running'), ('finished', 'Finished'), ('abandoned', 'Abandoned')], default='running', max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ScanJournalEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fingerprint', models.CharField(max_length=32)),
+                ('protocol', models.CharField(choices=[('vless', 'VLESS'), ('vmess', 'VMESS'), ('trojan', 'Trojan'), ('ss', 'Shadowsocks')], max_length=10)),
+                ('raw_link', models.TextField()),
+                ('source', models.CharField(blank=True, max_length=255, null=True)),
+                ('stage', models.CharField(choices=[('extracted', 'Extracted'), ('skipped', 'Skipped'), ('tcp_failed', 'TCP failed'), ('failed', 'Xray failed'), ('verified', 'Verified')], default='extracted', max_length=10)),
+                ('ping_ms', models.IntegerField(blank=True, null=True)),
+                ('speed_kbps', models.FloatField(blank=True, null=True)),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='entries', to='scanner.scanrun')),
+            ],
+            options={
+                'unique_together': {('run', 'fingerprint')},
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-19 17:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scanner', '0003_scan_journal'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scanrun',
+            name='metrics',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AlterField(
+            model_name='scanjournalentry',
+            name='stage',
+            field=models.CharField(choices=[('extracted', 'Extracted'), ('skipped', 'Skipped'), ('tcp_failed', 'TCP failed'), ('probed', 'TCP alive'), ('failed', 'Xray failed'), ('verified', 'Verified')], default='extracted', max_length=10),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.4 on 2026-10-19 17:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scanner', '0004_scan_concurrency_metrics'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NodeProbe',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('region', models.CharField(max_length=32)),
+                ('is_working', models.BooleanField(default=False)),
+                ('ping_ms', models.IntegerField(blank=True, null=True)),
+                ('speed_kbps', models.FloatField(blank=True, null=True)),
+                ('checked_at', models.DateTimeField(auto_now=True)),
+                ('node', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='probes', to='scanner.node')),
+            ],
+            options={
+                'unique_together': {('node', 'region')},
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.4 on 2026-10-19 17:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scanner', '0005_node_probe'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubscriptionArtifact',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('format', models.CharField(choices=[('base64', 'Base64'), ('clash', 'Clash'), ('singbox', 'sing-box')], max_length=10)),
+                ('region', models.CharField(blank=True, default='', max_length=32)),
+                ('version', models.PositiveIntegerField()),
+                ('content', models.TextField()),
+                ('node_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'unique_together': {('format', 'region', 'version')},
+            },
+        ),
+    ]
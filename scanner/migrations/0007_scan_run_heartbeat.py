@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-19 17:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scanner', '0006_subscription_artifact'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scanrun',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.4 on 2026-10-19 18:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scanner', '0007_scan_run_heartbeat'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scanjournalentry',
+            name='host',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name='scanjournalentry',
+            name='port',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='scanjournalentry',
+            name='user_id',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+    ]
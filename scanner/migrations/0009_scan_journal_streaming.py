@@ -0,0 +1,22 @@
+# Generated by Django 5.2.4 on 2026-10-19 18:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scanner', '0008_scan_journal_endpoint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scanrun',
+            name='extracted_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='scanjournalentry',
+            index=models.Index(fields=['run', 'protocol', 'host', 'port'], name='scanner_journal_endpoint'),
+        ),
+    ]
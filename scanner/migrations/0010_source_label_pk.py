@@ -0,0 +1,32 @@
+from django.db import migrations
+
+
+def labels_to_pk(apps, schema_editor):
+    Channel = apps.get_model('scanner', 'Channel')
+    Mirror = apps.get_model('scanner', 'Mirror')
+    Node = apps.get_model('scanner', 'Node')
+    for channel in Channel.objects.all():
+        Node.objects.filter(source=f'channel:{channel.username}').update(source=f'channel:{channel.pk}')
+    for mirror in Mirror.objects.all():
+        Node.objects.filter(source=f'mirror:{mirror.name}').update(source=f'mirror:{mirror.pk}')
+
+
+def labels_to_name(apps, schema_editor):
+    Channel = apps.get_model('scanner', 'Channel')
+    Mirror = apps.get_model('scanner', 'Mirror')
+    Node = apps.get_model('scanner', 'Node')
+    for channel in Channel.objects.all():
+        Node.objects.filter(source=f'channel:{channel.pk}').update(source=f'channel:{channel.username}')
+    for mirror in Mirror.objects.all():
+        Node.objects.filter(source=f'mirror:{mirror.pk}').update(source=f'mirror:{mirror.name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scanner', '0009_scan_journal_streaming'),
+    ]
+
+    operations = [
+        migrations.RunPython(labels_to_pk, labels_to_name),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-19 18:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scanner', '0010_source_label_pk'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='subscriptionartifact',
+            name='render_started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
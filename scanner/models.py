@@ -5,6 +5,8 @@ class Mirror(models.Model):
     url = models.URLField(unique=True)
     active = models.BooleanField(default=True)
     last_checked = models.DateTimeField(null=True, blank=True)
+    yield_score = models.FloatField(default=0)
+    next_scan_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
@@ -15,6 +17,8 @@ class Channel(models.Model):
     username = models.CharField(max_length=255, unique=True)
     active = models.BooleanField(default=True)
     last_checked = models.DateTimeField(null=True, blank=True)
+    yield_score = models.FloatField(default=0)
+    next_scan_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     def __str__(self):
         return self.username
@@ -48,3 +52,123 @@ class Node(models.Model):
 
     def __str__(self):
         return f"{self.protocol.upper()} {self.host}:{self.port} {self.remark or ''}"
+
+
+class SourceScan(models.Model):
+    """Per-source statistics recorded for each scan of a Mirror or Channel."""
+    mirror = models.ForeignKey(Mirror, null=True, blank=True, on_delete=models.CASCADE, related_name='scans')
+    channel = models.ForeignKey(Channel, null=True, blank=True, on_delete=models.CASCADE, related_name='scans')
+
+    links_extracted = models.PositiveIntegerField(default=0)
+    unique_new = models.PositiveIntegerField(default=0)
+    tcp_alive = models.PositiveIntegerField(default=0)
+    xray_verified = models.PositiveIntegerField(default=0)
+    fetch_latency_ms = models.IntegerField(blank=True, null=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.mirror or self.channel} {self.xray_verified}/{self.links_extracted}"
+
+
+class ScanRun(models.Model):
+    RUNNING = 'running'
+    FINISHED = 'finished'
+    ABANDONED = 'abandoned'
+    STATUS_CHOICES = [
+        (RUNNING, 'Running'),
+        (FINISHED, 'Finished'),
+        (ABANDONED, 'Abandoned'),
+    ]
+
+    scope = models.CharField(max_length=1024)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=RUNNING)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Heartbeat of the process running the scan, see scanner.journal
+    updated_at = models.DateTimeField(auto_now=True)
+    # Set once every source was fetched; only such runs can be resumed
+    extracted_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # Concurrency controller decisions per stage, see scanner.concurrency
+    metrics = models.JSONField(default=dict, blank=True)
+
+    def __str__(self):
+        return f"Scan #{self.pk} {self.status}"
+
+
+class ScanJournalEntry(models.Model):
+    """Progress of one extracted link within a ScanRun."""
+    EXTRACTED = 'extracted'
+    SKIPPED = 'skipped'
+    TCP_FAILED = 'tcp_failed'
+    PROBED = 'probed'
+    FAILED = 'failed'
+    VERIFIED = 'verified'
+    STAGE_CHOICES = [
+        (EXTRACTED, 'Extracted'),
+        (SKIPPED, 'Skipped'),
+        (TCP_FAILED, 'TCP failed'),
+        (PROBED, 'TCP alive'),
+        (FAILED, 'Xray failed'),
+        (VERIFIED, 'Verified'),
+    ]
+
+    run = models.ForeignKey(ScanRun, on_delete=models.CASCADE, related_name='entries')
+    fingerprint = models.CharField(max_length=32)
+    protocol = models.CharField(max_length=10, choices=Node.PROTOCOL_CHOICES)
+    raw_link = models.TextField()
+    # Decoded endpoint, so a resumed scan does not parse the link again
+    host = models.CharField(max_length=255, blank=True, null=True)
+    port = models.PositiveIntegerField(blank=True, null=True)
+    user_id = models.CharField(max_length=255, blank=True, null=True)
+    source = models.CharField(max_length=255, blank=True, null=True)
+    stage = models.CharField(max_length=10, choices=STAGE_CHOICES, default=EXTRACTED)
+    ping_ms = models.IntegerField(blank=True, null=True)
+    speed_kbps = models.FloatField(blank=True, null=True)
+
+    class Meta:
+        unique_together = ('run', 'fingerprint')
+        indexes = [models.Index(fields=['run', 'protocol', 'host', 'port'], name='scanner_journal_endpoint')]
+
+
+class NodeProbe(models.Model):
+    """Latest probe result for a Node from one region-tagged worker."""
+    node = models.ForeignKey(Node, on_delete=models.CASCADE, related_name='probes')
+    region = models.CharField(max_length=32)
+    is_working = models.BooleanField(default=False)
+    ping_ms = models.IntegerField(blank=True, null=True)
+    speed_kbps = models.FloatField(blank=True, null=True)
+    checked_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('node', 'region')
+
+    def __str__(self):
+        return f"{self.node} @ {self.region}"
+
+
+class SubscriptionArtifact(models.Model):
+    """A subscription pre-rendered in a client format after a scan."""
+    BASE64 = 'base64'
+    CLASH = 'clash'
+    SINGBOX = 'singbox'
+    FORMAT_CHOICES = [
+        (BASE64, 'Base64'),
+        (CLASH, 'Clash'),
+        (SINGBOX, 'sing-box'),
+    ]
+
+    format = models.CharField(max_length=10, choices=FORMAT_CHOICES)
+    region = models.CharField(max_length=32, blank=True, default='')
+    version = models.PositiveIntegerField()
+    content = models.TextField()
+    node_count = models.PositiveIntegerField(default=0)
+    # When the render began reading nodes; changes after this are not included
+    render_started_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('format', 'region', 'version')
+
+    def __str__(self):
+        return f"{self.format} {self.region or 'global'} v{self.version}"
@@ -0,0 +1,161 @@
+import base64
+import json
+import re
+
+from .dedup import fingerprint
+
+patterns = {
+    'vless': re.compile(r'vless://[^\s]+'),
+    'vmess': re.compile(r'vmess://[^\s]+'),
+    'trojan': re.compile(r'trojan://[^\s]+'),
+    # vless:// and vmess:// also contain "ss://"
+    'ss': re.compile(r'(?<![A-Za-z])ss://[^\s]+'),
+}
+
+def parse_query_params(link):
+    try:
+        query = link.split('?', 1)[1].split('#')[0]
+        params = dict(x.split('=') for x in query.split('&') if '=' in x)
+        return params
+    except Exception:
+        return {}
+
+def extract_host_port(link, proto):
+    try:
+        if proto in ['vless', 'trojan']:
+            part = link.split('://')[1].split('@')[-1]
+            hostport = part.split('?')[0].split('#')[0]
+            host, port = hostport.split(':')
+            return host, int(port)
+        elif proto == 'vmess':
+            b64_payload = link.split('vmess://')[1].split('#')[0]
+            padded = b64_payload + '=' * (-len(b64_payload) % 4)
+            decoded = base64.b64decode(padded).decode()
+            json_data = json.loads(decoded)
+            return json_data.get('add'), int(json_data.get('port'))
+        elif proto == 'ss':
+            ss_part = link.split('ss://')[1].split('#')[0]
+            if '@' in ss_part:
+                hostport = ss_part.split('@')[-1]
+            else:
+                padded = ss_part + '=' * (-len(ss_part) % 4)
+                decoded = base64.b64decode(padded).decode()
+                _, hostport = decoded.rsplit('@', 1)
+            host, port = hostport.split(':')
+            return host, int(port)
+    except Exception:
+        return None, None
+
+def extract_user_id(link, proto):
+    try:
+        if proto in ['vless', 'trojan']:
+            part = link.split('://')[1]
+            user = part.split('@')[0]
+            return user
+        elif proto == 'vmess':
+            b64_payload = link.split('vmess://')[1].split('#')[0]
+            padded = b64_payload + '=' * (-len(b64_payload) % 4)
+            decoded = base64.b64decode(padded).decode()
+            json_data = json.loads(decoded)
+            return json_data.get('id')
+        elif proto == 'ss':
+            ss_part = link.split('ss://')[1].split('#')[0]
+            if '@' in ss_part:
+                userpass_b64 = ss_part.split('@')[0]
+                padded = userpass_b64 + '=' * (-len(userpass_b64) % 4)
+                decoded = base64.b64decode(padded).decode()
+                method, password = decoded.split(':', 1)
+            else:
+                decoded = base64.b64decode(ss_part + '=' * (-len(ss_part) % 4)).decode()
+                method, rest = decoded.split(':', 1)
+                password, _ = rest.split('@', 1)
+            return password, method
+    except Exception:
+        return None
+
+
+def build_outbound(link, proto):
+    """Xray outbound for a link; shared by xray tests and rendered subscriptions."""
+    host, port = extract_host_port(link, proto)
+    params = parse_query_params(link)
+    if proto == 'ss':
+        user_id, method = extract_user_id(link, proto)
+    else:
+        user_id = extract_user_id(link, proto)
+        method = None
+
+    stream_settings = {"network": params.get('type', 'tcp')}
+    # Trojan runs over TLS unless the link says otherwise; older links use peer= for the SNI
+    if params.get('security', 'tls' if proto == 'trojan' else 'none') == 'tls':
+        stream_settings["security"] = "tls"
+        sni = params.get('sni') or params.get('peer')
+        if sni:
+            stream_settings["tlsSettings"] = {"serverName": sni}
+    if stream_settings['network'] == 'ws':
+        stream_settings['wsSettings'] = {"path": params.get('path', '/'), "headers": {"Host": params.get('host', host)}}
+    if stream_settings['network'] == 'grpc':
+        stream_settings['grpcSettings'] = {"serviceName": params.get('serviceName', ''), "multiMode": False}
+
+    if proto in ['vless', 'vmess']:
+        outbound = {
+            "protocol": proto,
+            "settings": {
+                "vnext": [{
+                    "address": host,
+                    "port": port,
+                    "users": [{"id": user_id, "encryption": "none" if proto == 'vless' else "auto"}]
+                }]
+            },
+            "streamSettings": stream_settings
+        }
+    elif proto == 'trojan':
+        outbound = {
+            "protocol": "trojan",
+            "settings": {"servers": [{"address": host, "port": port, "password": user_id}]},
+            "streamSettings": stream_settings
+        }
+    elif proto == 'ss':
+        outbound = {
+            "protocol": "shadowsocks",
+            "settings": {"servers": [{"address": host, "port": port, "password": user_id, "method": method}]}
+        }
+    return outbound
+
+def node_user_id(user):
+    # ss users come back as (password, method)
+    return user[0] if isinstance(user, tuple) else user
+
+def parse_chunk(text):
+    """
+    Extract every link in text as a compact tuple of
+    (proto, host, port, user_id, fingerprint, raw), where user_id is the
+    Node.user_id form. Decoding happens here, so a pool spreads it over cores.
+    """
+    parsed = []
+    for proto, pattern in patterns.items():
+        for link in pattern.findall(text):
+            link = link.strip()
+            host, port = extract_host_port(link, proto)
+            user_id = node_user_id(extract_user_id(link, proto))
+            parsed.append((proto, host, port, user_id, fingerprint(link), link))
+    return parsed
+
+def split_lines(text, chunk_lines):
+    # Links never span a newline, so line-aligned chunks parse independently.
+    lines = text.splitlines()
+    for i in range(0, len(lines), chunk_lines):
+        yield '\n'.join(lines[i:i + chunk_lines])
+
+def parse_body(text, pool=None, chunk_lines=20000):
+    """Parse a fetched body, fanning large ones out to a process pool."""
+    if pool is None or text.count('\n') < chunk_lines:
+        return parse_chunk(text)
+    try:
+        parsed = []
+        for chunk in pool.map(parse_chunk, split_lines(text, chunk_lines)):
+            parsed.extend(chunk)
+        return parsed
+    except Exception as e:
+        # e.g. Celery prefork children are daemonic and cannot fork a pool
+        print(f"⚠️ Parse pool unavailable, parsing inline: {e}")
+        return parse_chunk(text)
@@ -0,0 +1,95 @@
+import datetime
+
+from django.conf import settings
+from django.db.models import Count, FilteredRelation, Q
+from django.utils import timezone
+
+from .models import Node, NodeProbe
+
+regions = getattr(settings, 'SCANNER_REGIONS', [])
+quorum = getattr(settings, 'SCANNER_REGION_QUORUM', len(regions) // 2 + 1)
+probe_max_age = getattr(settings, 'SCANNER_REGION_PROBE_MAX_AGE', 6 * 60 * 60)
+batch_size = getattr(settings, 'SCANNER_REGION_BATCH_SIZE', 200)
+# Region the central scanner's own retests are recorded under; they only
+# count towards the quorum when this is one of `regions`.
+local_region = getattr(settings, 'SCANNER_REGION', None) or 'central'
+
+
+def region_queue(region):
+    """Celery queue consumed by the workers of one region, next to the default queue."""
+    return f'{settings.CELERY_TASK_DEFAULT_QUEUE}.{region}'
+
+
+def probe_cutoff():
+    return timezone.now() - datetime.timedelta(seconds=probe_max_age)
+
+
+def node_payload(node):
+    """Everything a region worker needs to probe a node, without database access."""
+    return {'pk': node.pk, 'protocol': node.protocol, 'host': node.host, 'port': node.port,
+            'raw_link': node.raw_link}
+
+
+def dispatch_region_probes(node_ids, run_id=None):
+    """
+    Send the same batches of nodes to every region's queue. Nodes travel in
+    the task arguments, so region workers only need the broker.
+    """
+    from .tasks import probe_region_task
+    nodes = [node_payload(node) for node in Node.objects.filter(pk__in=node_ids).order_by('pk')]
+    for i in range(0, len(nodes), batch_size):
+        batch = nodes[i:i + batch_size]
+        for region in regions:
+            probe_region_task.apply_async(args=(batch, region, run_id), queue=region_queue(region))
+
+
+def record_region_probes(region, results):
+    """
+    Store one region's probe results and merge the verdicts of the probed
+    nodes. Runs centrally; results for nodes deleted meanwhile are dropped.
+    """
+    existing = set(Node.objects.filter(pk__in=[r['node'] for r in results]).values_list('pk', flat=True))
+    for result in results:
+        if result['node'] in existing:
+            NodeProbe.objects.update_or_create(node_id=result['node'], region=region, defaults={
+                'is_working': result['is_working'],
+                'ping_ms': result['ping_ms'],
+                'speed_kbps': result['speed_kbps'],
+            })
+    return merge_region_verdicts(existing)
+
+
+def merge_region_verdicts(node_ids):
+    """
+    Decide nodes from fresh regional probes: working once `quorum` regions
+    agree, deleted once the quorum can no longer be reached. Nodes still
+    waiting on regions keep their current verdict.
+    """
+    fresh = Q(probes__checked_at__gte=probe_cutoff(), probes__region__in=regions)
+    nodes = Node.objects.filter(pk__in=node_ids).annotate(
+        regions_probed=Count('probes', filter=fresh),
+        regions_working=Count('probes', filter=fresh & Q(probes__is_working=True)),
+    )
+    working = []
+    dead = []
+    for node in nodes:
+        if node.regions_working >= quorum:
+            if not node.is_working:
+                node.is_working = True
+                working.append(node)
+        elif node.regions_probed - node.regions_working > len(regions) - quorum:
+            dead.append(node.pk)
+    if working:
+        Node.objects.bulk_update(working, ['is_working'])
+    if dead:
+        Node.objects.filter(pk__in=dead).delete()
+        print(f'🗑️ Deleted {len(dead)} configs that failed the region quorum')
+    return len(working) + len(dead)
+
+
+def best_nodes_for_region(region):
+    """Working nodes with a fresh working probe from region, fastest first."""
+    return (Node.objects.filter(is_working=True)
+            .annotate(probe=FilteredRelation('probes', condition=Q(probes__region=region)))
+            .filter(probe__is_working=True, probe__checked_at__gte=probe_cutoff())
+            .order_by('probe__ping_ms'))
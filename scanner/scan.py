@@ -0,0 +1,21 @@
+"""
+Lightweight entry points for the admin, Celery tasks and management commands.
+
+Importing this module is cheap; `scanner.actions` and its scanning
+dependencies are only imported when a scan actually runs.
+"""
+
+
+def run_full_scan_sync(channel_ids=None, mirror_ids=None):
+    from .actions import run_full_scan_sync
+    return run_full_scan_sync(channel_ids=channel_ids, mirror_ids=mirror_ids)
+
+
+def verify_links(links, source=None):
+    from .actions import verify_links
+    return verify_links(links, source=source)
+
+
+def probe_region(nodes, region):
+    from .actions import probe_region
+    return probe_region(nodes, region)
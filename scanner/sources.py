@@ -0,0 +1,88 @@
+import datetime
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Channel, Mirror, SourceScan
+
+yield_alpha = getattr(settings, 'SCANNER_YIELD_ALPHA', 0.3)
+min_interval = getattr(settings, 'SCANNER_SCHEDULE_MIN_INTERVAL', 30 * 60)
+max_interval = getattr(settings, 'SCANNER_SCHEDULE_MAX_INTERVAL', 24 * 60 * 60)
+telegram_polling = getattr(settings, 'SCANNER_TELEGRAM_POLLING', True)
+
+
+def source_label(source):
+    """Node.source value for nodes found in a Mirror or Channel; keyed on the pk so renames keep it."""
+    kind = 'mirror' if isinstance(source, Mirror) else 'channel'
+    return f'{kind}:{source.pk}'
+
+
+def retest_scope(channel_ids=None, mirror_ids=None, now=None):
+    """
+    Node filter for the retest of a scoped scan: nodes of the scoped sources,
+    plus orphans (no source, or an inactive or deleted one) not checked for
+    max_interval, since no scheduled scan owns them.
+    """
+    now = now or timezone.now()
+    scoped = list(Channel.objects.filter(id__in=channel_ids or []))
+    scoped += list(Mirror.objects.filter(id__in=mirror_ids or []))
+    active = list(Channel.objects.filter(active=True)) + list(Mirror.objects.filter(active=True))
+    orphan = Q(source__isnull=True) | ~Q(source__in=[source_label(s) for s in active])
+    stale = Q(last_checked__lt=now - datetime.timedelta(seconds=max_interval))
+    return Q(source__in=[source_label(s) for s in scoped]) | (orphan & stale)
+
+
+class SourceStats:
+    """Counters for one Mirror or Channel during a single scan."""
+
+    def __init__(self, source):
+        self.source = source
+        self.links_extracted = 0
+        self.unique_new = 0
+        self.tcp_alive = 0
+        self.xray_verified = 0
+        self.fetch_latency_ms = None
+
+    @property
+    def label(self):
+        return source_label(self.source)
+
+
+def next_interval(yield_score):
+    """Seconds until the next scan: high-yield sources come back sooner."""
+    return max(min_interval, min(max_interval, max_interval / (1 + yield_score)))
+
+
+def record_source_scans(source_stats):
+    """Store a SourceScan per source and reschedule it based on its yield."""
+    now = timezone.now()
+    for stats in source_stats:
+        source = stats.source
+        SourceScan.objects.create(
+            mirror=source if isinstance(source, Mirror) else None,
+            channel=source if isinstance(source, Channel) else None,
+            links_extracted=stats.links_extracted,
+            unique_new=stats.unique_new,
+            tcp_alive=stats.tcp_alive,
+            xray_verified=stats.xray_verified,
+            fetch_latency_ms=stats.fetch_latency_ms,
+        )
+        source.yield_score = yield_alpha * stats.xray_verified + (1 - yield_alpha) * source.yield_score
+        source.last_checked = now
+        source.next_scan_at = now + datetime.timedelta(seconds=next_interval(source.yield_score))
+        source.save(update_fields=['yield_score', 'last_checked', 'next_scan_at'])
+
+
+def due_sources(now=None):
+    """
+    Return (channel_ids, mirror_ids) of active sources whose next scan is due.
+    Channels are left out when the Telegram listener replaces polling.
+    """
+    now = now or timezone.now()
+    due = Q(next_scan_at__isnull=True) | Q(next_scan_at__lte=now)
+    channel_ids = []
+    if telegram_polling:
+        channel_ids = list(Channel.objects.filter(due, active=True).values_list('id', flat=True))
+    mirror_ids = list(Mirror.objects.filter(due, active=True).values_list('id', flat=True))
+    return channel_ids, mirror_ids
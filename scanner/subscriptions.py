@@ -0,0 +1,189 @@
+import base64
+import datetime
+import json
+import time
+
+from django.conf import settings
+from django.db import IntegrityError, OperationalError, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import Node, SubscriptionArtifact
+from .parsing import build_outbound
+from .regions import best_nodes_for_region, regions
+
+keep_versions = 3
+version_attempts = 5
+# Seconds pushed links and region results wait, so a burst renders once
+render_delay = getattr(settings, 'SCANNER_RENDER_DELAY', 30)
+
+
+def outbound_endpoint(outbound):
+    servers = outbound['settings']
+    if 'vnext' in servers:
+        server = servers['vnext'][0]
+        return server['address'], server['port'], server['users'][0]['id']
+    server = servers['servers'][0]
+    return server['address'], server['port'], server['password']
+
+
+def clash_proxy(name, outbound):
+    """Clash (Meta) proxy entry for an xray outbound."""
+    server, port, secret = outbound_endpoint(outbound)
+    protocol = outbound['protocol']
+    proxy = {'name': name, 'server': server, 'port': port, 'udp': True}
+    if protocol == 'shadowsocks':
+        proxy.update(type='ss', cipher=outbound['settings']['servers'][0]['method'], password=secret)
+        return proxy
+    if protocol == 'trojan':
+        proxy.update(type='trojan', password=secret)
+    else:
+        proxy.update(type=protocol, uuid=secret)
+    if protocol == 'vmess':
+        proxy.update(alterId=0, cipher='auto')
+    stream = outbound.get('streamSettings', {})
+    network = stream.get('network', 'tcp')
+    proxy['network'] = network
+    if stream.get('security') == 'tls':
+        # Clash trojan is always TLS and names its SNI key differently
+        if protocol != 'trojan':
+            proxy['tls'] = True
+        if 'tlsSettings' in stream:
+            proxy['sni' if protocol == 'trojan' else 'servername'] = stream['tlsSettings']['serverName']
+    if network == 'ws':
+        proxy['ws-opts'] = {'path': stream['wsSettings']['path'], 'headers': stream['wsSettings']['headers']}
+    elif network == 'grpc':
+        proxy['grpc-opts'] = {'grpc-service-name': stream['grpcSettings']['serviceName']}
+    return proxy
+
+
+def singbox_outbound(tag, outbound):
+    """sing-box outbound for an xray outbound."""
+    server, port, secret = outbound_endpoint(outbound)
+    protocol = outbound['protocol']
+    result = {'tag': tag, 'server': server, 'server_port': port}
+    if protocol == 'shadowsocks':
+        result.update(type='shadowsocks', method=outbound['settings']['servers'][0]['method'], password=secret)
+        return result
+    if protocol == 'trojan':
+        result.update(type='trojan', password=secret)
+    else:
+        result.update(type=protocol, uuid=secret)
+    if protocol == 'vmess':
+        result.update(security='auto', alter_id=0)
+    stream = outbound.get('streamSettings', {})
+    if stream.get('security') == 'tls':
+        result['tls'] = {'enabled': True, 'server_name': stream.get('tlsSettings', {}).get('serverName', server)}
+    network = stream.get('network', 'tcp')
+    if network == 'ws':
+        result['transport'] = {'type': 'ws', 'path': stream['wsSettings']['path'],
+                               'headers': stream['wsSettings']['headers']}
+    elif network == 'grpc':
+        result['transport'] = {'type': 'grpc', 'service_name': stream['grpcSettings']['serviceName']}
+    return result
+
+
+def node_outbounds(nodes):
+    """Yield (unique name, raw link, xray outbound) for every node that converts cleanly."""
+    names = set()
+    for node in nodes:
+        try:
+            outbound = build_outbound(node.raw_link, node.protocol)
+            outbound_endpoint(outbound)
+        except Exception:
+            continue
+        name = node.remark or f'{node.protocol}-{node.host}:{node.port}'
+        unique, i = name, 1
+        while unique in names:
+            i += 1
+            unique = f'{name} {i}'
+        names.add(unique)
+        yield unique, node.raw_link, outbound
+
+
+def render_base64(entries):
+    links = '\n'.join(link for _, link, _ in entries) + '\n'
+    return base64.b64encode(links.encode()).decode()
+
+
+def render_clash(entries):
+    # JSON flow mappings are valid YAML, so no YAML library is needed.
+    # Without nodes the group falls back to DIRECT, which Clash always has.
+    names = [name for name, _, _ in entries] or ['DIRECT']
+    lines = ['proxies:' if entries else 'proxies: []']
+    lines += [f'  - {json.dumps(clash_proxy(name, outbound), ensure_ascii=False)}' for name, _, outbound in entries]
+    lines += ['proxy-groups:',
+              f'  - {json.dumps({"name": "PROXY", "type": "select", "proxies": names}, ensure_ascii=False)}',
+              'rules:',
+              '  - MATCH,PROXY']
+    return '\n'.join(lines) + '\n'
+
+
+def render_singbox(entries):
+    outbounds = [singbox_outbound(name, outbound) for name, _, outbound in entries]
+    # A selector needs at least one outbound
+    outbounds.append({'type': 'selector', 'tag': 'proxy', 'outbounds': [name for name, _, _ in entries] or ['direct']})
+    outbounds.append({'type': 'direct', 'tag': 'direct'})
+    return json.dumps({'outbounds': outbounds}, ensure_ascii=False, indent=2)
+
+
+renderers = {
+    SubscriptionArtifact.BASE64: render_base64,
+    SubscriptionArtifact.CLASH: render_clash,
+    SubscriptionArtifact.SINGBOX: render_singbox,
+}
+
+
+def create_artifact(fmt, region, content, node_count, render_started_at=None):
+    """
+    Store content as the next version of (fmt, region). Versions are unique,
+    so a concurrent render taking the same number makes this one retry.
+    """
+    artifacts = SubscriptionArtifact.objects.filter(format=fmt, region=region)
+    for attempt in range(version_attempts):
+        try:
+            with transaction.atomic():
+                version = (artifacts.aggregate(Max('version'))['version__max'] or 0) + 1
+                artifact = SubscriptionArtifact.objects.create(format=fmt, region=region, version=version,
+                                                               content=content, node_count=node_count,
+                                                               render_started_at=render_started_at)
+                artifacts.filter(version__lte=version - keep_versions).delete()
+            return artifact
+        except (IntegrityError, OperationalError):
+            # Version taken, or sqlite busy with the other writer
+            if attempt == version_attempts - 1:
+                raise
+            time.sleep(0.1 * (attempt + 1))
+
+
+def render_subscriptions():
+    """Render every client format, globally and per region, into a new artifact version."""
+    started = timezone.now()
+    scopes = {'': Node.objects.filter(is_working=True)}
+    for region in regions:
+        scopes[region] = best_nodes_for_region(region)
+    for region, nodes in scopes.items():
+        entries = list(node_outbounds(nodes))
+        for fmt, render in renderers.items():
+            create_artifact(fmt, region, render(entries), len(entries), render_started_at=started)
+    print(f'📦 Rendered subscriptions for {len(scopes)} scope(s)')
+
+
+def schedule_render():
+    """Queue one render `render_delay` seconds from now; see render_subscriptions_task."""
+    from .tasks import render_subscriptions_task
+    render_subscriptions_task.apply_async(args=(time.time(),), countdown=render_delay)
+
+
+def rendered_since(requested_at):
+    """
+    True if a render started after the request, so its artifacts already
+    include the request's changes. A render that was still running when the
+    request came in may have read the nodes before them.
+    """
+    since = datetime.datetime.fromtimestamp(requested_at, tz=datetime.timezone.utc)
+    return SubscriptionArtifact.objects.filter(render_started_at__gte=since).exists()
+
+
+def latest_artifact(fmt, region=''):
+    return SubscriptionArtifact.objects.filter(format=fmt, region=region).order_by('-version').first()
@@ -2,7 +2,11 @@ import logging
 
 from django.conf import settings
 from config.celery import app
-from .actions import run_full_scan_sync
+from .scan import probe_region, run_full_scan_sync, verify_links
+from .journal import record_region_decisions
+from .regions import record_region_probes
+from .sources import due_sources
+from .subscriptions import render_subscriptions, rendered_since, schedule_render
 
 task_logger = logging.getLogger("task")
 
@@ -11,3 +15,50 @@ task_logger = logging.getLogger("task")
 def run_full_scan_sync_task(self):
     """Celery task to trigger run_full_scan_sync."""
     run_full_scan_sync()
+
+
+@app.task(bind=True, ignore_result=False, queue=settings.CELERY_TASK_DEFAULT_QUEUE)
+def run_scheduled_scan_task(self):
+    """Celery task to scan only the sources whose yield-based schedule is due."""
+    channel_ids, mirror_ids = due_sources()
+    if not channel_ids and not mirror_ids:
+        task_logger.info("No sources due for scanning")
+        return
+    run_full_scan_sync(channel_ids=channel_ids or None, mirror_ids=mirror_ids or None)
+
+
+@app.task(bind=True, ignore_result=False, queue=settings.CELERY_TASK_DEFAULT_QUEUE)
+def verify_links_task(self, links, source=None):
+    """Celery task to verify links pushed by the Telegram listener."""
+    return verify_links(links, source=source)
+
+
+@app.task(bind=True, ignore_result=False, queue=settings.CELERY_TASK_DEFAULT_QUEUE)
+def probe_region_task(self, nodes, region, run_id=None):
+    """Celery task run by a region's workers (routed to its queue) to probe a batch of nodes."""
+    if settings.SCANNER_REGION and settings.SCANNER_REGION != region:
+        task_logger.warning("Worker region %s is probing for region %s", settings.SCANNER_REGION, region)
+    results, decisions = probe_region(nodes, region)
+    # Results are stored by the central workers on the default queue
+    record_region_probes_task.apply_async(args=(region, results, decisions, run_id),
+                                          queue=settings.CELERY_TASK_DEFAULT_QUEUE)
+    return len(results)
+
+
+@app.task(bind=True, ignore_result=False, queue=settings.CELERY_TASK_DEFAULT_QUEUE)
+def record_region_probes_task(self, region, results, decisions=None, run_id=None):
+    """Celery task to store a region's probe results and apply the quorum."""
+    if decisions and run_id is not None:
+        record_region_decisions(run_id, region, decisions)
+    changed = record_region_probes(region, results)
+    schedule_render()
+    return changed
+
+
+@app.task(bind=True, ignore_result=False, queue=settings.CELERY_TASK_DEFAULT_QUEUE)
+def render_subscriptions_task(self, requested_at):
+    """Celery task to re-render subscriptions, skipped if a render already ran after the request."""
+    if rendered_since(requested_at):
+        return False
+    render_subscriptions()
+    return True
@@ -4,6 +4,8 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from .models import Node
+from .regions import best_nodes_for_region
+from .subscriptions import latest_artifact
 
 
 class PlainTextRenderer(BaseRenderer):
@@ -12,14 +14,44 @@ class PlainTextRenderer(BaseRenderer):
     charset = 'utf-8'
 
     def render(self, data, media_type=None, renderer_context=None):
+        if isinstance(data, dict):
+            # DRF error responses, e.g. an unknown ?format=
+            data = f"{data.get('detail', data)}\n"
         return data if isinstance(data, bytes) else data.encode(self.charset)
 
+class Base64Renderer(PlainTextRenderer):
+    format = 'base64'
+
+class ClashRenderer(PlainTextRenderer):
+    media_type = 'text/yaml'
+    format = 'clash'
+
+class SingBoxRenderer(PlainTextRenderer):
+    media_type = 'application/json'
+    format = 'singbox'
+
 class WorkingNodesView(APIView):
     """
     API endpoint to return working nodes as a plain-text subscription link.
+    With ?region=<name>, only nodes working from that region are returned,
+    fastest first.
+    With ?format=base64|clash|singbox, the subscription pre-rendered after
+    the last scan is served as is.
     """
-    renderer_classes = [PlainTextRenderer]
+    renderer_classes = [PlainTextRenderer, Base64Renderer, ClashRenderer, SingBoxRenderer]
 
     def get(self, request):
-        links = Node.objects.filter(is_working=True).values_list('raw_link', flat=True)
+        region = request.query_params.get('region')
+        fmt = request.accepted_renderer.format
+        if fmt != PlainTextRenderer.format:
+            artifact = latest_artifact(fmt, region or '')
+            if artifact is None:
+                return Response('Subscription not rendered yet\n', status=status.HTTP_404_NOT_FOUND)
+            if not artifact.node_count:
+                # Clients keep their previous subscription instead of an empty one
+                return Response('No working nodes\n', status=status.HTTP_404_NOT_FOUND)
+            return Response(artifact.content, status=status.HTTP_200_OK,
+                            headers={'X-Subscription-Version': str(artifact.version)})
+        nodes = best_nodes_for_region(region) if region else Node.objects.filter(is_working=True)
+        links = nodes.values_list('raw_link', flat=True)
         return Response('\n'.join(links) + '\n', content_type='text/plain; charset=utf-8', status=status.HTTP_200_OK)